@@ -1,3 +1,11 @@
 __all__ = ["App"]
 
-from .app import App
+
+def __getattr__(name):
+    # Import the application (and its heavy dependencies like GitPython) only
+    # when used, so the CLI can parse its arguments or display its help first
+    if name == "App":
+        from .app import App
+
+        return App
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
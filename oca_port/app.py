@@ -1,7 +1,13 @@
 # Copyright 2022 Camptocamp SA
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl)
+import os
 import pathlib
+import threading
+import weakref
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import cached_property
 import re
 
 import git
@@ -12,7 +18,53 @@ from .migrate_addon import MigrateAddon
 from .port_addon_pr import PortAddonPullRequest
 from .utils.git import Branch
 from .utils.github import GitHub
-from .utils.misc import Output, bcolors as bc, extract_ref_info
+from .utils.misc import (
+    MANIFEST_NAMES,
+    Output,
+    bcolors as bc,
+    SmartDict,
+    extract_ref_info,
+    get_manifest_path,
+)
+
+ODOO_VERSION_REGEX = re.compile(r"\A[0-9]+\.[0-9]\Z")
+
+# 'git.Repo' instances shared among 'App' instances (library mode).
+# A 'git.Repo' object is not thread-safe (persistent 'git cat-file'
+# processes), so each thread gets its own registry.
+_REPOS = threading.local()
+
+
+def _get_repos():
+    """Return the registry `{path: repo}` of the current thread.
+
+    Repositories are only weakly referenced: they are released (and their
+    'git cat-file' processes stopped) once no application uses them anymore.
+    """
+    if not hasattr(_REPOS, "repos"):
+        _REPOS.repos = weakref.WeakValueDictionary()
+    return _REPOS.repos
+
+
+def _get_repo(repo_path):
+    """Return the `git.Repo` object of `repo_path`.
+
+    Opening a repository (reading its configuration, starting 'git cat-file'
+    processes...) is done once per path and per thread, so applications
+    processing several addons of the same repository share the same object.
+    """
+    key = pathlib.Path(repo_path).resolve()
+    repos = _get_repos()
+    repo = repos.get(key)
+    if repo is not None and not os.path.isdir(repo.git_dir):
+        # Repository has been removed in the meantime
+        repo.close()
+        repo = None
+    if repo is None:
+        # Objects are read through persistent 'git cat-file --batch'
+        # processes instead of spawning a 'git' command per lookup
+        repo = repos[key] = git.Repo(key, odbt=git.GitCmdObjectDB)
+    return repo
 
 
 @dataclass
@@ -57,6 +109,11 @@ class App(Output):
         github_token:
             Token to use when requesting GitHub API (highly recommended
             to not trigger the "API rate limit exceeded" error).
+        require_clean_worktree:
+            check that the repository has no uncommitted changes (default).
+            Untracked files are only looked for if commits could be written.
+            Can be disabled by library users only analyzing the history of
+            an addon, so the working tree doesn't have to be scanned.
     """
 
     source: str
@@ -76,11 +133,17 @@ class App(Output):
     no_cache: bool = False
     clear_cache: bool = False
     github_token: str = None
+    require_clean_worktree: bool = True
     cli: bool = False  # Not documented, should not be used outside of the CLI
 
     _available_outputs = ("json",)
+    _remote_branches = None
 
     def __post_init__(self):
+        # Results of addon existence checks, by commit
+        self._addon_exists = {}
+        # Parsed references (and their remote URL), by reference
+        self._ref_infos = {}
         self._prepare_parameters()
         # Force non-interactive mode:
         #   - if we are not in CLI mode
@@ -92,61 +155,78 @@ class App(Output):
                 outputs = ", ".join(self._available_outputs)
                 raise ValueError(f"Supported outputs are: {outputs}")
             self.non_interactive = True
+        self._check_worktree()
+        from_ref, to_ref = self.from_branch.ref(), self.to_branch.ref()
         # Fetch branches if they can't be resolved locally
-        # NOTE: required for the storage below to retrieve data
-        remote_branches = self.repo.git.branch("-r").split()
+        # NOTE: required for the storage to retrieve data
         if (
             self.fetch
-            or (
-                self.from_branch.remote
-                and self.from_branch.ref() not in remote_branches
-            )
-            or (self.to_branch.remote and self.to_branch.ref() not in remote_branches)
+            or (self.from_branch.remote and from_ref not in self._get_remote_branches())
+            or (self.to_branch.remote and to_ref not in self._get_remote_branches())
         ):
             self.fetch_branches()
         # Check if source & target branches exist
         self._check_branch_exists(self.source.ref, raise_exc=True)
         self._check_branch_exists(self.target.ref, raise_exc=True)
-        # GitHub API helper
-        self.github = GitHub(self.github_token)
-        # Initialize storage & cache
-        self.storage = utils.storage.InputStorage(self.to_branch, self.addon)
-        self.cache = utils.cache.UserCacheFactory(self).build()
+        # Resolve branches once, further lookups are done by SHA
+        self.from_sha = self.repo.commit(from_ref).hexsha
+        self.to_sha = self.repo.commit(to_ref).hexsha
 
-    def _handle_odoo_versions(self):
-        odoo_version_pattern = r"^[0-9]+\.[0-9]$"
-        source_version = re.search(odoo_version_pattern, self.source.branch)
-        target_version = re.search(odoo_version_pattern, self.target.branch)
-        source_param = "--source-version" if self.cli else "source_version"
-        target_param = "--target-version" if self.cli else "target_version"
-        # Check Odoo versions from branches
-        if not source_version and not self.source_version:
-            raise ValueError(
-                f"Unable to identify Odoo source version from {self.source.branch}.\n"
-                f"Use {source_param} parameter to identify Odoo source version."
-            )
-        if not target_version and not self.target_version:
-            raise ValueError(
-                f"Unable to identify Odoo target version from {self.target.branch}.\n"
-                f"Use {target_param} parameter to identify target Odoo version."
+    @cached_property
+    def storage(self):
+        """Storage of user's inputs related to the addon."""
+        return utils.storage.InputStorage(self.to_branch, self.addon)
+
+    @cached_property
+    def cache(self):
+        """User's cache."""
+        return utils.cache.UserCacheFactory(self).build()
+
+    @cached_property
+    def github(self):
+        """GitHub API helper."""
+        return GitHub(self.github_token, cache=self.cache)
+
+    def _get_remote_branches(self):
+        """Return the names of source/target remotes branches available locally."""
+        # NOTE: remote refs are read in-process from '.git/' by GitPython,
+        # sparing a 'git branch -r' subprocess
+        if self._remote_branches is None:
+            # Only list branches of the remotes we are interested in
+            remotes = {
+                branch.remote
+                for branch in (self.from_branch, self.to_branch)
+                if branch.remote
+            }
+            self._remote_branches = frozenset(
+                ref.name
+                for remote in remotes
+                for ref in git.RemoteReference.list_items(self.repo, remote=remote)
             )
-        # Check source_version and target_version parameters
-        if self.source_version and not re.search(
-            odoo_version_pattern, self.source_version
-        ):
-            raise ValueError(f"Unable to identify Odoo version from {source_param}.")
-        if self.target_version and not re.search(
-            odoo_version_pattern, self.target_version
-        ):
-            raise ValueError(f"Unable to identify Odoo version from {target_param}.")
-        self.source_version = self.source_version or source_version.string
-        self.target_version = self.target_version or target_version.string
+        return self._remote_branches
+
+    def _handle_odoo_versions(self):
+        for kind in ("source", "target"):
+            version_attr = f"{kind}_version"
+            version = getattr(self, version_attr)
+            param = f"--{kind}-version" if self.cli else version_attr
+            # Check source_version and target_version parameters
+            if version:
+                if not ODOO_VERSION_REGEX.match(version):
+                    raise ValueError(f"Unable to identify Odoo version from {param}.")
+                continue
+            # Check Odoo versions from branches
+            branch = getattr(self, kind).branch
+            if not ODOO_VERSION_REGEX.match(branch):
+                raise ValueError(
+                    f"Unable to identify Odoo {kind} version from {branch}.\n"
+                    f"Use {param} parameter to identify Odoo {kind} version."
+                )
+            setattr(self, version_attr, branch)
 
     def _prepare_parameters(self):
         # Handle Git repository
-        self.repo = git.Repo(self.repo_path)
-        if self.repo.is_dirty(untracked_files=True):
-            raise ValueError("changes not committed detected in this repository.")
+        self.repo = _get_repo(self.repo_path)
 
         # Module name
         self.addon_path = pathlib.Path(self.addon_path)
@@ -157,20 +237,20 @@ class App(Output):
         for key in ("source", "target", "destination"):
             value = getattr(self, key)
             if value and isinstance(value, str):
-                setattr(self, key, extract_ref_info(self.repo, key, value))
+                setattr(self, key, self._extract_ref_info(key, value))
         # Check Odoo versions from source and target branches and parameters
         self._handle_odoo_versions()
 
         # Always provide a destination:
         if not self.destination:
-            self.destination = extract_ref_info(self.repo, "destination", "")
+            self.destination = self._extract_ref_info("destination", "")
             # Unset org that could have been taken from 'origin'.
             self.destination.org = None
             # If target.org is different than upstream_org, generate the
             # destination from target so we get the remote+org for free (if any)
             if self.target.org != self.upstream_org:
-                self.destination = extract_ref_info(
-                    self.repo, "destination", self.target.ref
+                self.destination = self._extract_ref_info(
+                    "destination", self.target.ref
                 )
                 # If destination is not a local one, or not an Odoo version,
                 # it will be generated by the specific tool
@@ -186,7 +266,7 @@ class App(Output):
             self.repo_name
             or self.target.repo
             or self.source.repo
-            or self.repo_path.absolute().name
+            or os.path.basename(os.path.abspath(self.repo_path))
         )
         if not self.repo_path:
             raise ValueError("'repo_path' has to be set.")
@@ -240,38 +320,152 @@ class App(Output):
                     )
                 self._print(msg)
 
+    def _check_worktree(self):
+        """Check that the working tree is clean.
+
+        Looking for untracked files means scanning the whole working tree,
+        so this is only done when commits could be written in the repository.
+        """
+        self.worktree_clean = False
+        if not self.require_clean_worktree:
+            return
+        read_only = self.non_interactive or self.dry_run
+        if utils.git.is_dirty(self.repo, untracked_files=not read_only):
+            raise ValueError("changes not committed detected in this repository.")
+        self.worktree_clean = not read_only
+
+    def _extract_ref_info(self, kind, ref):
+        """Return the info of `ref`, parsing it only once."""
+        if ref not in self._ref_infos:
+            self._ref_infos[ref] = extract_ref_info(self.repo, kind, ref)
+        # Return a copy as callers update it
+        info = SmartDict(self._ref_infos[ref])
+        info["kind"] = kind
+        return info
+
     def _prepare_branch(self, info):
         try:
             return Branch(self.repo, info.branch, default_remote=info.remote)
         except ValueError as exc:
             remote = exc.args[1]
             if remote not in self.repo.remotes:
-                raise RemoteBranchValueError(info) from exc
+                raise RemoteBranchValueError(self.repo_name, remote) from exc
 
     def fetch_branches(self):
+        # Group branches by remote to fetch them with one 'git fetch' per
+        # remote (one connection and one pack negotiation)
+        branches_by_remote = defaultdict(list)
         for branch in (self.from_branch, self.to_branch):
-            if not branch.remote:
-                continue
-            remote_url = branch.repo.remotes[branch.remote].url
-            if self.verbose:
-                self._print(f"Fetch {bc.BOLD}{branch.ref()}{bc.END} from {remote_url}")
-            branch.repo.remotes[branch.remote].fetch(branch.name)
+            if branch.remote and branch.name not in branches_by_remote[branch.remote]:
+                branches_by_remote[branch.remote].append(branch.name)
+        if not branches_by_remote:
+            return
+        if self.verbose:
+            for remote_name, branch_names in branches_by_remote.items():
+                remote_url = self.repo.remotes[remote_name].url
+                for branch_name in branch_names:
+                    self._print(
+                        f"Fetch {bc.BOLD}{remote_name}/{branch_name}{bc.END} "
+                        f"from {remote_url}"
+                    )
+        if len(branches_by_remote) == 1:
+            # Usual case (e.g. 'origin/15.0' and 'origin/16.0'): one fetch
+            ((remote_name, branch_names),) = branches_by_remote.items()
+            self._fetch_remote(remote_name, branch_names)
+        else:
+            # Remotes are independent network-bound operations: fetch them
+            # concurrently (git releases the GIL while running in a subprocess)
+            with ThreadPoolExecutor(max_workers=len(branches_by_remote)) as executor:
+                futures = [
+                    executor.submit(self._fetch_remote, remote_name, branch_names)
+                    for remote_name, branch_names in branches_by_remote.items()
+                ]
+                for future in futures:
+                    # Surface fetch errors (if any)
+                    future.result()
+        self._write_commit_graph()
+        # Remote branches have been updated
+        self._remote_branches = None
+
+    def _fetch_remote(self, remote_name, branch_names):
+        """Fetch `branch_names` from `remote_name`.
+
+        This could run in several threads at once: the shared `git.Repo` object
+        is not thread-safe (persistent 'git cat-file' processes, parsing of
+        FETCH_HEAD...), so 'git fetch' is run from a dedicated command object
+        and nothing is read back from the repository.
+        """
+        # Concurrent fetches would compete for the commit-graph lock, the
+        # commit-graph is updated once all remotes have been fetched
+        kwargs = {"no_write_commit_graph": True}
+        # Opt-in partial fetch, e.g. 'blob:none' to download only commits and
+        # trees (blobs are then fetched on demand by git).
+        # NOTE: this turns the repository into a partial clone.
+        fetch_filter = os.environ.get("OCA_PORT_FETCH_FILTER")
+        if fetch_filter:
+            kwargs["filter"] = fetch_filter
+        # Concurrent fetches would overwrite the same FETCH_HEAD file
+        git.Git(self.repo.working_dir).fetch(
+            remote_name, *branch_names, no_write_fetch_head=True, **kwargs
+        )
+
+    def _write_commit_graph(self):
+        """Add the fetched commits to the commit-graph of the repository.
+
+        History walks (merge bases, 'git log A..B' between source and target)
+        then don't have to decompress every commit object. This is only done
+        if the repository already uses a commit-graph.
+        """
+        objects_info = pathlib.Path(self.repo.common_dir, "objects", "info")
+        if not (
+            objects_info.joinpath("commit-graph").is_file()
+            or objects_info.joinpath("commit-graphs").is_dir()
+        ):
+            return
+        self.repo.git.commit_graph("write", "--reachable", "--split")
 
     def _check_branch_exists(self, branch, raise_exc=False):
-        for ref in self.repo.refs:
-            if branch == ref.name:
+        # Look up the reference directly (loose or packed) instead of listing
+        # all the references of the repository
+        for prefix in ("refs/heads", "refs/remotes", "refs/tags"):
+            if git.Reference(self.repo, f"{prefix}/{branch}").is_valid():
                 return True
         if raise_exc:
             raise ValueError(f"Ref {branch} doesn't exist.")
         return False
 
-    def _check_addon_exists(self, branch, raise_exc=False):
-        repo = self.repo
-        addons_tree = repo.commit(branch.ref()).tree
-        if self.addons_rootdir and self.addons_rootdir.name:
-            addons_tree /= str(self.addons_rootdir)
-        branch_addons = [t.path for t in addons_tree.trees]
-        if str(self.addon_path) not in branch_addons:
+    def _is_checked_out(self, commit_sha):
+        """Check if `commit_sha` is checked out in a clean working tree."""
+        return (
+            self.worktree_clean
+            and not self.repo.bare
+            and self.repo.head.is_valid()
+            and self.repo.head.commit.hexsha == commit_sha
+        )
+
+    def _check_addon_exists(self, branch, commit_sha, raise_exc=False):
+        if commit_sha not in self._addon_exists:
+            if self._is_checked_out(commit_sha):
+                # Checking the (clean) working tree is cheaper than reading
+                # trees from the Git object database
+                addon_dir = pathlib.Path(self.repo.working_tree_dir, self.addon_path)
+                exists = bool(get_manifest_path(addon_dir))
+            else:
+                # Look up the addon path directly instead of listing all the
+                # folders of the addons root directory
+                try:
+                    commit = self.repo.commit(commit_sha)
+                    entry = commit.tree / str(self.addon_path)
+                except KeyError:
+                    entry = None
+                # Same rule as for the working tree: a manifest is required
+                exists = (
+                    entry is not None
+                    and entry.type == "tree"
+                    and any(blob.name in MANIFEST_NAMES for blob in entry.blobs)
+                )
+            self._addon_exists[commit_sha] = exists
+        if not self._addon_exists[commit_sha]:
             if not raise_exc:
                 return False
             error = f"{self.addon_path} does not exist on {branch.ref()}"
@@ -285,23 +479,32 @@ class App(Output):
 
     def check_addon_exists_from_branch(self, raise_exc=False):
         """Check that `addon` exists on the source branch`."""
-        return self._check_addon_exists(self.from_branch, raise_exc=raise_exc)
+        return self._check_addon_exists(
+            self.from_branch, self.from_sha, raise_exc=raise_exc
+        )
 
     def check_addon_exists_to_branch(self, raise_exc=False):
         """Check that `addon` exists on the target branch`."""
-        return self._check_addon_exists(self.to_branch, raise_exc=raise_exc)
+        return self._check_addon_exists(
+            self.to_branch, self.to_sha, raise_exc=raise_exc
+        )
 
     def run(self):
         """Run 'oca-port' to migrate an addon or to port its pull requests."""
         self.check_addon_exists_from_branch(raise_exc=True)
-        # Check if some PRs could be ported
-        res, output = self.run_port()
-        if not res:
-            # If not, migrate the addon
-            res, output = self.run_migrate()
+        if self.from_sha == self.to_sha:
+            # Nothing to port nor to migrate between the same commits
+            res, output = False, None
+        else:
+            # Check if some PRs could be ported
+            res, output = self.run_port()
+            if not res:
+                # If not, migrate the addon
+                res, output = self.run_migrate()
+        if self.output and not output:
+            # Nothing to port or migrate: render an empty result once
+            output = self._render_output(self.output, {})
         if self.cli and self.output:
-            if not output:
-                output = self._render_output(self.output, {})
             print(output)
         if self.clear_cache:
             self.cache.clear()
@@ -54,9 +54,7 @@ of them.
 
 import click
 
-from ..app import App
-from ..exceptions import ForkValueError, RemoteBranchValueError
-from ..utils.misc import bcolors as bc
+from ..exceptions import RemoteBranchValueError
 
 
 @click.command()
@@ -137,6 +135,9 @@ def main(
             The PRs are found from SOURCE commits that do not exist in TARGET.
     The user will be asked if he wants to port them.
     """
+    # Import the application only once arguments are parsed
+    from ..app import App
+
     try:
         app = App(
             addon_path=addon_path,
@@ -157,14 +158,9 @@ def main(
             cli=True,
             github_token=github_token,
         )
-    except ForkValueError as exc:
-        error_msg = prepare_remote_error_msg(*exc.args)
-        error_msg += (
-            "\n\nYou can change the GitHub organization with the "
-            f"{bc.DIM}--user-org{bc.END} option."
-        )
-        raise click.ClickException(error_msg) from exc
     except RemoteBranchValueError as exc:
+        from ..utils.misc import prepare_remote_error_msg
+
         error_msg = prepare_remote_error_msg(*exc.args)
         raise click.ClickException(error_msg) from exc
     except ValueError as exc:
@@ -176,19 +172,5 @@ def main(
         raise click.ClickException(exc) from exc
 
 
-def prepare_remote_error_msg(repo_name, remote):
-    return (
-        f"No remote {bc.FAIL}{remote}{bc.END} in the current repository.\n"
-        "To add it:\n"
-        "\t# This mode requires an SSH key in the GitHub account\n"
-        f"\t{bc.DIM}$ git remote add {remote} "
-        f"git@github.com:{remote}/{repo_name}.git{bc.END}\n"
-        "   Or:\n"
-        "\t# This will require to enter user/password each time\n"
-        f"\t{bc.DIM}$ git remote add {remote} "
-        f"https://github.com/{remote}/{repo_name}.git{bc.END}"
-    )
-
-
 if __name__ == "__main__":
     main()
@@ -4,11 +4,6 @@
 import os
 
 import click
-import git
-
-from ..exceptions import RemoteBranchValueError
-from ..utils.git import Branch
-from ..utils.storage import InputStorage
 
 
 @click.group()
@@ -38,6 +33,13 @@ def blacklist(
     remote: str,
 ):
     """Blacklist one or more PRs"""
+    # Import GitPython & co only once arguments are parsed
+    import git
+
+    from ..utils.git import Branch
+    from ..utils.misc import prepare_remote_error_msg
+    from ..utils.storage import InputStorage
+
     # eg: https://github.com/user/repo/pull/1234 or just the number
     # TODO: validate! Must be URL or ref like `OCA/edi#1`
     pr_refs = [x.strip() for x in prs.split(",") if x.strip()]
@@ -49,7 +51,9 @@ def blacklist(
         branch = Branch(repo, target_branch, default_remote=remote)
     except ValueError as exc:
         if exc.args[1] not in repo.remotes:
-            raise RemoteBranchValueError(repo.name, exc.args[1]) from exc
+            repo_name = os.path.basename(repo.working_tree_dir)
+            error_msg = prepare_remote_error_msg(repo_name, exc.args[1])
+            raise click.ClickException(error_msg) from exc
 
     storage = InputStorage(branch, addon)
     for ref in pr_refs:
@@ -2,9 +2,5 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
 
-class ForkValueError(ValueError):
-    pass
-
-
 class RemoteBranchValueError(ValueError):
     pass
@@ -1,10 +1,9 @@
 # Copyright 2022 Camptocamp SA
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl)
 
-import os
-import tempfile
+import importlib.util
 import urllib.parse
-from importlib import metadata
+from functools import cached_property
 
 import click
 
@@ -71,11 +70,33 @@ MIG_BLACKLIST_STEPS = ("push_blacklist", "create_pr")
 MIG_ADAPTED_STEPS = ("reduce_commits", "adapt_module", "amend_mig_commit", "create_pr")
 
 
+def _generate_mig_steps(steps):
+    result = []
+    for i, step in enumerate(steps, 1):
+        text = f"\t{i}) " + MIG_STEPS[step]
+        result.append(text)
+    return "\n".join(result)
+
+
+# Tips templates, only their placeholders remain to be filled
+MIG_USUAL_TIPS = _generate_mig_steps(MIG_USUAL_STEPS)
+MIG_BLACKLIST_TIPS = _generate_mig_steps(MIG_BLACKLIST_STEPS)
+MIG_ADAPTED_TIPS = _generate_mig_steps(MIG_ADAPTED_STEPS)
+
+# Look for 'odoo-module-migrator' once instead of scanning the installed
+# distributions at each migration
+HAS_MODULE_MIGRATOR = importlib.util.find_spec("odoo_module_migrate") is not None
+
+
 class MigrateAddon(Output):
     def __init__(self, app):
         self.app = app
         self._results = {"process": "migrate", "results": {}}
-        self.mig_branch = g.Branch(
+
+    @cached_property
+    def mig_branch(self):
+        """Branch hosting the migration (not needed if there is nothing to do)."""
+        return g.Branch(
             self.app.repo,
             (
                 self.app.destination.branch
@@ -141,7 +162,8 @@ class MigrateAddon(Output):
             self.app.storage.blacklist_addon(confirm=True)
             if not self.app.storage.dirty:
                 return False, None
-        if self.app.repo.untracked_files:
+        # No need to scan the working tree again if the application did it
+        if not self.app.worktree_clean and self.app.repo.untracked_files:
             raise click.ClickException("Untracked files detected, abort")
         self._checkout_base_branch()
         adapted = False
@@ -151,15 +173,16 @@ class MigrateAddon(Output):
                 self.app.storage.commit()
                 self._print_tips(blacklisted=True)
                 return False, None
-            with tempfile.TemporaryDirectory() as patches_dir:
-                self._generate_patches(patches_dir)
-                self._apply_patches(patches_dir)
-
-            try:
-                metadata.metadata("odoo-module-migrator")
-                adapted = self._apply_code_pattern()
-            except metadata.PackageNotFoundError:
-                g.run_pre_commit(self.app.repo, self.app.addon)
+            # Nothing to adapt or to lint if no patch has been applied
+            if self._apply_patches():
+                if HAS_MODULE_MIGRATOR:
+                    adapted = self._apply_code_pattern()
+                else:
+                    # Files brought by the migration
+                    files = self.app.repo.git.diff(
+                        "--name-only", self.app.to_sha, "HEAD"
+                    ).splitlines()
+                    g.run_pre_commit(self.app.repo, self.app.addon, files=files)
         # Check if the addon has commits that update neighboring addons to
         # make it work properly
         PortAddonPullRequest(self.app, push_branch=False).run()
@@ -168,8 +191,8 @@ class MigrateAddon(Output):
 
     def _checkout_base_branch(self):
         # Ensure to not start to work from a working branch
-        if self.app.to_branch.name in self.app.repo.heads:
-            self.app.repo.heads[self.app.to_branch.name].checkout()
+        if g.head_exists(self.app.repo, self.app.to_branch.name):
+            g.get_head(self.app.repo, self.app.to_branch.name).checkout()
         else:
             self.app.repo.git.checkout(
                 "--no-track",
@@ -180,48 +203,56 @@ class MigrateAddon(Output):
 
     def _create_mig_branch(self):
         create_branch = True
-        if self.mig_branch.name in self.app.repo.heads:
+        if g.head_exists(self.app.repo, self.mig_branch.name):
             confirm = (
                 f"Branch {bc.BOLD}{self.mig_branch.name}{bc.END} already exists, "
                 "recreate it?\n(⚠️  you will lose the existing branch)"
             )
-            if click.confirm(confirm):
-                self.app.repo.delete_head(self.mig_branch.name, "-f")
-            else:
-                create_branch = False
+            create_branch = click.confirm(confirm)
         if create_branch:
-            # Create branch
+            # Create branch, or reset the existing one ('-B')
             print(
                 f"\tCreate branch {bc.BOLD}{self.mig_branch.name}{bc.END} "
                 f"from {self.app.to_branch.ref()}..."
             )
             self.app.repo.git.checkout(
-                "--no-track", "-b", self.mig_branch.name, self.app.to_branch.ref()
+                "--no-track", "-B", self.mig_branch.name, self.app.to_branch.ref()
             )
         return create_branch
 
-    def _generate_patches(self, patches_dir):
-        print("\tGenerate patches...")
-        self.app.repo.git.format_patch(
+    def _apply_patches(self):
+        """Apply the patches of the addon history, return their number."""
+        # Branches have been resolved by the application
+        commits_range = f"{self.app.to_sha}..{self.app.from_sha}"
+        # 'git format-patch' skips merge commits
+        nb_patches = int(
+            self.app.repo.git.rev_list(
+                "--count", "--no-merges", commits_range, "--", self.app.addon_path
+            )
+        )
+        if not nb_patches:
+            print("\tNo patch to apply.")
+            return nb_patches
+        # Stream the patches generated by git-format-patch to git-am instead
+        # of writing them in a temporary folder
+        print(f"\tApply {nb_patches} patches...")
+        format_patch = self.app.repo.git.format_patch(
             "--keep-subject",
-            "-o",
-            patches_dir,
-            f"{self.app.to_branch.ref()}..{self.app.from_branch.ref()}",
+            # Diffstats are useless to git-am
+            "--no-stat",
+            "--stdout",
+            commits_range,
             "--",
             self.app.addon_path,
+            as_process=True,
         )
-
-    def _apply_patches(self, patches_dir):
-        patches = [
-            os.path.join(patches_dir, f) for f in sorted(os.listdir(patches_dir))
-        ]
-        # Apply patches with git-am
-        print(f"\tApply {len(patches)} patches...")
-        self.app.repo.git.am("-3", "--keep", *patches)
+        self.app.repo.git.am("-3", "--keep", istream=format_patch.stdout)
+        format_patch.wait()
         print(
             f"\t\tCommits history of {bc.BOLD}{self.app.addon}{bc.END} "
             f"has been migrated."
         )
+        return nb_patches
 
     def _print_tips(self, blacklisted=False, adapted=False):
         mig_tasks_url = MIG_TASKS_URL.format(version=self.app.target_version)
@@ -238,51 +269,28 @@ class MigrateAddon(Output):
             mig_branch=self.mig_branch.name,
             title=pr_title_encoded,
         )
+        # Placeholders not used by a template are ignored by 'str.format'
+        values = {
+            "from_org": self.app.upstream_org,
+            "repo_name": self.app.repo_name,
+            "addon": self.app.addon,
+            "version": self.app.target_version,
+            "remote": self.app.destination.remote or "YOUR_REMOTE",
+            "mig_branch": self.mig_branch.name,
+            "mig_tasks_url": mig_tasks_url,
+            "new_pr_url": new_pr_url,
+        }
         if blacklisted:
-            steps = self._generate_mig_steps(MIG_BLACKLIST_STEPS)
-            tips = steps.format(
-                from_org=self.app.upstream_org,
-                repo_name=self.app.repo_name,
-                remote=self.app.destination.remote,
-                mig_branch=self.mig_branch.name,
-                new_pr_url=new_pr_url,
-            )
-            print(tips)
-            return tips
-        if adapted:
-            steps = self._generate_mig_steps(MIG_ADAPTED_STEPS)
-            tips = steps.format(
-                from_org=self.app.upstream_org,
-                repo_name=self.app.repo_name,
-                version=self.app.target_version,
-                remote=self.app.destination.remote or "YOUR_REMOTE",
-                mig_branch=self.mig_branch.name,
-                mig_tasks_url=mig_tasks_url,
-                new_pr_url=new_pr_url,
-            )
-            print(tips)
-            return tips
-        steps = self._generate_mig_steps(MIG_USUAL_STEPS)
-        tips = steps.format(
-            from_org=self.app.upstream_org,
-            repo_name=self.app.repo_name,
-            addon=self.app.addon,
-            version=self.app.target_version,
-            remote=self.app.destination.remote or "YOUR_REMOTE",
-            mig_branch=self.mig_branch.name,
-            mig_tasks_url=mig_tasks_url,
-            new_pr_url=new_pr_url,
-        )
+            tips = MIG_BLACKLIST_TIPS
+            values["remote"] = self.app.destination.remote
+        elif adapted:
+            tips = MIG_ADAPTED_TIPS
+        else:
+            tips = MIG_USUAL_TIPS
+        tips = tips.format(**values)
         print(tips)
         return tips
 
-    def _generate_mig_steps(self, steps):
-        result = []
-        for i, step in enumerate(steps, 1):
-            text = f"\t{i}) " + MIG_STEPS[step]
-            result.append(text)
-        return "\n".join(result)
-
     def _apply_code_pattern(self):
         print("Apply code pattern...")
         from odoo_module_migrate.migration import Migration
@@ -5,8 +5,6 @@ import os
 import hashlib
 import itertools
 import pathlib
-import shutil
-import tempfile
 import urllib.parse
 from collections import defaultdict
 
@@ -147,10 +145,10 @@ class PortAddonPullRequest(Output):
             # Nothing to port while having WIP means the porting is done
             return wip
         # Check if destination branch exists, and create it if not
-        dest_branch_exists = dest_branch_name in self.app.repo.heads
+        dest_branch_exists = g.head_exists(self.app.repo, dest_branch_name)
         base_ref = self.app.to_branch  # e.g. 'origin/14.0'
         if dest_branch_exists:
-            target_commit = self.app.repo.commit(self.app.target.ref)
+            target_commit = self.app.repo.commit(self.app.to_sha)
             dest_commit = self.app.repo.commit(dest_branch_name)
             # If target and destination branches are on the same commit we don't care
             if target_commit != dest_commit:
@@ -193,7 +191,7 @@ class PortAddonPullRequest(Output):
             )
         # Checkout the destination branch before porting PRs
         dest_branch = g.Branch(self.app.repo, dest_branch_name)
-        self.app.repo.heads[dest_branch.name].checkout()
+        g.get_head(self.app.repo, dest_branch.name).checkout()
         last_pr = (
             list(branches_diff.commits_diff["addon"].keys())[-1]
             if branches_diff.commits_diff["addon"]
@@ -418,22 +416,19 @@ class PortAddonPullRequest(Output):
                 self._print("\t\t\tℹ️  Nothing to port from this commit, skipping")
                 continue
             try:
-                patches_dir = tempfile.mkdtemp()
-                self.app.repo.git.format_patch(
+                # Stream the patch to git-am instead of writing it on disk
+                format_patch = self.app.repo.git.format_patch(
                     "--keep-subject",
-                    "-o",
-                    patches_dir,
+                    "--no-stat",
+                    "--stdout",
                     "-1",
                     commit.hexsha,
                     "--",
                     *paths_to_port,
+                    as_process=True,
                 )
-                patches = [
-                    os.path.join(patches_dir, f)
-                    for f in sorted(os.listdir(patches_dir))
-                ]
-                self.app.repo.git.am("-3", "--keep", *patches)
-                shutil.rmtree(patches_dir)
+                self.app.repo.git.am("-3", "--keep", istream=format_patch.stdout)
+                format_patch.wait()
             except git.exc.GitCommandError as exc:
                 self._print(f"{bc.FAIL}ERROR:{bc.ENDC}\n{exc}\n")
                 # High chance a conflict occurs, ask the user to resolve it
@@ -551,15 +546,13 @@ class PortAddonPullRequest(Output):
         }
 
     def _search_pull_request(self, base_branch, title):
-        params = {
-            "q": (
-                f"is:pr "
-                f"repo:{self.app.upstream_org}/{self.app.repo_name} "
-                f"base:{base_branch} "
-                f"state:open {title} in:title"
-            ),
-        }
-        response = self.app.github.request("search/issues", params=params)
+        query = (
+            f"is:pr "
+            f"repo:{self.app.upstream_org}/{self.app.repo_name} "
+            f"base:{base_branch} "
+            f"state:open {title} in:title"
+        )
+        response = self.app.github.search_issues(query)
         if response["items"]:
             return response["items"][0]["html_url"]
 
@@ -620,6 +613,8 @@ class BranchesDiff(Output):
         self.to_branch_all_commits, _ = self._get_branch_commits(
             self.app.to_branch.ref()
         )
+        # Original PRs data of commits, requested in batch from GitHub
+        self._original_prs = {}
         self.commits_diff = self.get_commits_diff()
         self.serialized_diff = self._serialize_diff(self.commits_diff)
         # Once the analyze is done, we store the cache on disk
@@ -755,14 +750,14 @@ class BranchesDiff(Output):
                 )
             )
         )
+        # Read the folders of the target branch once
+        to_branch_paths = g.get_folder_paths(
+            self.app.repo,
+            self.app.to_sha,
+            rootdir=self.app.addons_rootdir and self.app.addons_rootdir.name,
+        )
         for path in pr_paths_not_ported:
-            path_exists = g.check_path_exists(
-                self.app.repo,
-                self.app.to_branch.ref(),
-                path,
-                rootdir=self.app.addons_rootdir and self.app.addons_rootdir.name,
-            )
-            if path_exists:
+            if path in to_branch_paths:
                 if verbose:
                     lines_to_print.append(f"\t{bc.OKGREEN}- {path}{bc.END}")
                 paths_ported.append(path)
@@ -805,10 +800,15 @@ class BranchesDiff(Output):
         commits_by_pr = defaultdict(list)
         fake_pr = g.PullRequest(*[""] * 6)
         # 1st loop to collect original PRs and stack orphaned commits in a fake PR
+        commits_to_check = []
         for commit in self.from_branch_path_commits:
             if commit in self.to_branch_all_commits:
                 self.app.cache.mark_commit_as_ported(commit.hexsha)
                 continue
+            commits_to_check.append(commit)
+        # Request original PRs of all these commits at once
+        self._fetch_original_prs(commits_to_check)
+        for commit in commits_to_check:
             # Get related Pull Request if any,
             # or fallback on a fake PR to host orphaned commits
             # This call has two effects:
@@ -926,6 +926,29 @@ class BranchesDiff(Output):
                 return True
         return False
 
+    def _fetch_original_prs(self, commits):
+        """Request GitHub in batch to get the original PRs of `commits`."""
+        if not any("github.com" in remote.url for remote in self.app.repo.remotes):
+            return
+        commit_shas = [
+            commit.hexsha
+            for commit in commits
+            if not self.app.cache.get_pr_from_commit(commit.hexsha)
+        ]
+        if not commit_shas:
+            return
+        src_repo_name = self.app.source.repo or self.app.repo_name
+        try:
+            self._original_prs = self.app.github.get_original_prs(
+                self.app.upstream_org,
+                src_repo_name,
+                self.app.from_branch.name,
+                commit_shas,
+            )
+        except (requests.exceptions.ConnectionError, RuntimeError):
+            # Fallback on requesting the original PR of each commit
+            self._original_prs = {}
+
     def _get_original_pr(self, commit: g.Commit, fallback_pr=None):
         """Return the original PR of a given commit.
 
@@ -940,6 +963,13 @@ class BranchesDiff(Output):
         # Request GitHub to get them
         if not any("github.com" in remote.url for remote in self.app.repo.remotes):
             return self._handle_fallback_pr(fallback_pr, commit)
+        # Data could have been requested in batch
+        if commit.hexsha in self._original_prs:
+            data = self._original_prs[commit.hexsha]
+            if data:
+                self.app.cache.store_commit_pr(commit.hexsha, data)
+                return g.PullRequest(**data)
+            return self._handle_fallback_pr(fallback_pr, commit)
         src_repo_name = self.app.source.repo or self.app.repo_name
         try:
             raw_data = self.app.github.get_original_pr(
@@ -1,5 +1,13 @@
+import gc
 import json
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
+import git
+
+from oca_port.app import _get_repos
 from oca_port.utils.misc import extract_ref_info
 
 from . import common
@@ -57,6 +65,35 @@ class TestApp(common.CommonCase):
         self.assertFalse(app.destination.branch)
         self.assertFalse(app.destination.branch)
 
+    def test_app_dirty_worktree(self):
+        with open(os.path.join(self.repo_path, "untracked.txt"), "w") as file_:
+            file_.write("test")
+        # Untracked files are ignored by read-only runs
+        self._create_app(self.source1, self.target1)
+        error_msg = "changes not committed detected in this repository."
+        with self.assertRaisesRegex(ValueError, error_msg):
+            self._create_app(
+                self.source1, self.target1, non_interactive=False, cli=True
+            )
+        # Staged changes are always detected
+        git.Repo(self.repo_path).index.add(["untracked.txt"])
+        with self.assertRaisesRegex(ValueError, error_msg):
+            self._create_app(self.source1, self.target1)
+        # Check can be disabled when the working tree doesn't matter
+        app = self._create_app(self.source1, self.target1, require_clean_worktree=False)
+        self.assertTrue(app.check_addon_exists_from_branch())
+
+    def test_app_shared_repo(self):
+        app1 = self._create_app(self.source1, self.target1)
+        app2 = self._create_app(self.source2, self.target2)
+        self.assertIs(app1.repo, app2.repo)
+        # Not shared with applications of other threads
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            app3 = executor.submit(
+                self._create_app, self.source1, self.target1
+            ).result()
+        self.assertIsNot(app3.repo, app1.repo)
+
     def test_check_addon_exists(self):
         app = self._create_app(self.source1, self.target2)
         # source
@@ -64,6 +101,25 @@ class TestApp(common.CommonCase):
         # target
         self.assertFalse(app.check_addon_exists_to_branch())
 
+    def test_check_addon_exists_without_manifest(self):
+        # Commit a folder named as the addon, but without manifest, on the
+        # branch checked out
+        repo = git.Repo(self.repo_path)
+        folder_path = os.path.join(self.repo_path, self.addon)
+        os.makedirs(folder_path)
+        readme_path = os.path.join(folder_path, "README.rst")
+        with open(readme_path, "w") as file_:
+            file_.write("test")
+        repo.index.add([readme_path])
+        repo.index.commit("Add a folder")
+        target = repo.active_branch.name
+        # Checked out in a clean working tree
+        app = self._create_app(self.source1, target, non_interactive=False, cli=True)
+        self.assertFalse(app.check_addon_exists_to_branch())
+        # Read from the Git object database
+        app = self._create_app(self.source1, target)
+        self.assertFalse(app.check_addon_exists_to_branch())
+
     def test_app_nothing_to_port(self):
         app = self._create_app(self.source1, self.target1)
         try:
@@ -88,6 +144,14 @@ class TestApp(common.CommonCase):
         res = app.run()
         self.assertFalse(res)
 
+    def test_app_same_branches(self):
+        # Source and target branches are targeting the same commit
+        app = self._create_app(self.source2, self.target1, output="json")
+        with mock.patch.object(app, "run_port") as run_port:
+            output = app.run()
+        run_port.assert_not_called()
+        self.assertEqual(json.loads(output), {})
+
     def test_app_module_to_migrate(self):
         app = self._create_app(self.source2, self.target2)
         try:
@@ -212,3 +276,22 @@ class TestApp(common.CommonCase):
         error_msg = "my_module does not exist on origin/17.0"
         with self.assertRaisesRegex(ValueError, error_msg):
             app.run()
+
+    def test_app_release_repo(self):
+        app1 = self._create_app(self.source1, self.target1)
+        app2 = self._create_app(self.source1, self.target2)
+        repo_ref = weakref.ref(app1.repo)
+        # Still used by 'app2'
+        del app1
+        gc.collect()
+        self.assertIs(app2.repo, repo_ref())
+        # Not used anymore
+        del app2
+        gc.collect()
+        self.assertIsNone(repo_ref())
+        self.assertFalse(_get_repos())
+        # Applications failing to initialize do not keep the repository
+        with self.assertRaises(ValueError):
+            self._create_app(self.source1, "99.0")
+        gc.collect()
+        self.assertFalse(_get_repos())
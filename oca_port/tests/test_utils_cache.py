@@ -1,6 +1,8 @@
 # Copyright 2023 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
+import time
+
 from . import common
 
 from oca_port.utils import cache
@@ -43,3 +45,33 @@ class TestUserCache(common.CommonCase):
         self.assertFalse(self.cache.get_commit_files(sha))
         self.cache.set_commit_files(sha, files)
         self.assertEqual(self.cache.get_commit_files(sha), files)
+
+    def test_http_response(self):
+        key = "https://api.github.com/repos/TEST/test/pulls/1"
+        data = {"number": 1}
+        self.assertFalse(self.cache.get_http_response(key))
+        self.cache.set_http_response(key, '"etag"', data)
+        response = self.cache.get_http_response(key)
+        self.assertEqual(response["etag"], '"etag"')
+        self.assertDictEqual(response["data"], data)
+
+    def test_http_response_expiration(self):
+        key = "https://api.github.com/search/issues?q=test"
+        self.cache.set_http_response(key, '"etag"', {"items": []})
+        response_time = time.time() - cache.HTTP_RESPONSE_TTL - 1
+        self.cache._http_responses[key]["time"] = response_time
+        self.assertFalse(self.cache.get_http_response(key))
+        # Expired responses are removed, only the most recent ones are kept
+        for i in range(cache.HTTP_RESPONSES_MAX + 1):
+            self.cache.set_http_response(f"{key}{i}", '"etag"', {"items": []})
+        self.cache.save()
+        self.assertEqual(len(self.cache._http_responses), cache.HTTP_RESPONSES_MAX)
+        self.assertNotIn(key, self.cache._http_responses)
+
+    def test_save_modified_only(self):
+        # Cache files have been removed by 'clear()' and are not recreated
+        self.cache.save()
+        self.assertFalse(self.cache._commits_data_path.exists())
+        self.cache.set_commit_files("TEST", ["a/b/test"])
+        self.cache.save()
+        self.assertIn("TEST", self.cache._commits_data_path.read_text())
@@ -2,8 +2,9 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
 import unittest
+from unittest import mock
 
-from oca_port.utils import github
+from oca_port.utils import cache, github
 
 
 class TestGitHub(unittest.TestCase):
@@ -14,6 +15,12 @@ class TestGitHub(unittest.TestCase):
     def test_token(self):
         assert self.gh.token == "test"
 
+    def test_token_without_gh(self):
+        with mock.patch.dict("os.environ", {"GITHUB_TOKEN": ""}), mock.patch(
+            "subprocess.check_output", side_effect=FileNotFoundError
+        ):
+            assert not github.GitHub().token
+
     def test_addon_in_text(self):
         # Matching OK
         res = self.gh._addon_in_text("a_b", "[16.0][MIG] a_b: migration to 16.0")
@@ -21,3 +28,155 @@ class TestGitHub(unittest.TestCase):
         # Module name is not the expected one: do not match
         res = self.gh._addon_in_text("a_b", "[16.0][MIG] a_b_c: migration to 16.0")
         assert not res
+
+    def test_request_etag(self):
+        gh_cache = mock.Mock(spec=cache.UserCache)
+        gh_cache.get_http_response.return_value = {}
+        gh = github.GitHub(token="test", cache=gh_cache)
+        response = mock.Mock(ok=True, status_code=200, headers={"ETag": '"1"'})
+        response.json.return_value = {"number": 1}
+        # Responses are only cached on demand
+        with mock.patch.object(gh.session, "get", return_value=response):
+            gh.request("repos/OCA/test/pulls/1")
+        gh_cache.get_http_response.assert_not_called()
+        gh_cache.set_http_response.assert_not_called()
+        with mock.patch.object(gh.session, "get", return_value=response) as get:
+            res = gh.request("repos/OCA/test/pulls/1", use_cache=True)
+        assert res == {"number": 1}
+        assert "If-None-Match" not in get.call_args.kwargs["headers"]
+        gh_cache.set_http_response.assert_called_once_with(
+            f"{github.GITHUB_API_URL}/repos/OCA/test/pulls/1", '"1"', {"number": 1}
+        )
+        # Same request: the response is not modified, cached data is returned
+        gh_cache.get_http_response.return_value = {
+            "etag": '"1"',
+            "data": {"number": 1},
+        }
+        response = mock.Mock(ok=True, status_code=304, headers={})
+        with mock.patch.object(gh.session, "get", return_value=response) as get:
+            res = gh.request("repos/OCA/test/pulls/1", use_cache=True)
+        assert res == {"number": 1}
+        assert get.call_args.kwargs["headers"]["If-None-Match"] == '"1"'
+        response.json.assert_not_called()
+
+    def test_search_issues(self):
+        item = {
+            "number": 1,
+            "state": "open",
+            "title": "[16.0][MIG] a_b: Migration to 16.0",
+            "html_url": "https://github.com/OCA/test/pull/1",
+            "user": {"login": "test", "id": 1},
+            "body": "Long description",
+            "labels": [],
+        }
+        response = mock.Mock(ok=True, status_code=200, headers={})
+        response.json.return_value = {"total_count": 1, "items": [item]}
+        with mock.patch.object(self.gh.session, "get", return_value=response):
+            res = self.gh.search_issues("is:pr a_b")
+        # Only the fields used by oca-port are kept (and cached)
+        assert res == {
+            "total_count": 1,
+            "items": [
+                {
+                    "number": 1,
+                    "state": "open",
+                    "title": "[16.0][MIG] a_b: Migration to 16.0",
+                    "html_url": "https://github.com/OCA/test/pull/1",
+                    "user": {"login": "test"},
+                }
+            ],
+        }
+
+    def test_get_original_prs(self):
+        pr_node = {
+            "number": 1,
+            "url": "https://github.com/OCA/test/pull/1",
+            "title": "TEST",
+            "body": "",
+            "mergedAt": "2023-01-01T00:00:00Z",
+            "author": {"login": "test"},
+            "baseRefName": "16.0",
+            "baseRepository": {"nameWithOwner": "OCA/test"},
+            "commits": {"nodes": [{"commit": {"oid": "SHA1"}}]},
+        }
+        other_pr_node = dict(pr_node, number=2, baseRefName="15.0")
+        response = {
+            "data": {
+                "repository": {
+                    "c0": {"associatedPullRequests": {"nodes": [pr_node]}},
+                    "c1": {"associatedPullRequests": {"nodes": [other_pr_node]}},
+                }
+            }
+        }
+        with mock.patch.object(self.gh, "request") as request:
+            request.return_value = response
+            res = self.gh.get_original_prs("OCA", "test", "16.0", ["SHA1", "SHA2"])
+        request.assert_called_once()
+        assert res == {
+            "SHA1": {
+                "number": 1,
+                "url": "https://github.com/OCA/test/pull/1",
+                "author": "test",
+                "title": "TEST",
+                "body": "",
+                "merged_at": "2023-01-01T00:00:00Z",
+                "commits": ["SHA1"],
+            },
+            # PR of this commit targets another branch
+            "SHA2": {},
+        }
+
+    def test_get_original_prs_errors(self):
+        # Errors are returned with a '200 OK' status
+        response = {
+            "data": None,
+            "errors": [{"type": "RATE_LIMITED", "message": "API rate limit"}],
+        }
+        with mock.patch.object(self.gh, "request", return_value=response):
+            with self.assertRaises(RuntimeError):
+                self.gh.get_original_prs("OCA", "test", "16.0", ["SHA1"])
+        # Unknown commits are not part of the result
+        response = {
+            "data": {
+                "repository": {
+                    "c0": {"associatedPullRequests": {"nodes": []}},
+                    "c1": None,
+                }
+            },
+            "errors": [{"type": "NOT_FOUND", "path": ["repository", "c1"]}],
+        }
+        with mock.patch.object(self.gh, "request", return_value=response):
+            res = self.gh.get_original_prs("OCA", "test", "16.0", ["SHA1", "SHA2"])
+        assert res == {"SHA1": {}}
+
+    def test_search_migration_pr(self):
+        def item(number, state, title="[16.0][MIG] a_b: Migration to 16.0"):
+            return {
+                "number": number,
+                "state": state,
+                "title": title,
+                "html_url": f"https://github.com/OCA/test/pull/{number}",
+                "user": {"login": "test"},
+                "body": "",
+            }
+
+        items = [
+            item(1, "closed"),
+            item(2, "open", title="[16.0][MIG] a_b_c: Migration to 16.0"),
+            item(3, "open"),
+        ]
+        with mock.patch.object(self.gh, "request") as request:
+            request.return_value = {"items": items}
+            pr = self.gh.search_migration_pr("OCA", "test", "16.0", "a_b")
+        request.assert_called_once()
+        assert pr.number == 3
+        # Open PRs could be missing from a full page of results
+        responses = [
+            {"items": [item(1, "closed")], "total_count": 150},
+            {"items": [item(4, "open")], "total_count": 1},
+        ]
+        with mock.patch.object(self.gh, "request", side_effect=responses) as request:
+            pr = self.gh.search_migration_pr("OCA", "test", "16.0", "a_b")
+        assert request.call_count == 2
+        assert "is:open" in request.call_args.kwargs["params"]["q"]
+        assert pr.number == 4
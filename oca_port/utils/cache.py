@@ -5,12 +5,18 @@ import json
 import logging
 import os
 import pathlib
+import time
 from collections import defaultdict
 
 from . import misc
 
 _logger = logging.getLogger(__name__)
 
+# Cached GitHub API responses expire after 30 days, and only the most
+# recent ones are kept so the cache file doesn't grow indefinitely
+HTTP_RESPONSE_TTL = 30 * 24 * 3600
+HTTP_RESPONSES_MAX = 100
+
 
 class UserCacheFactory:
     """User's cache manager factory."""
@@ -69,6 +75,14 @@ class NoCache:
         # Do nothing
         pass
 
+    def get_http_response(self, key: str):
+        # No HTTP response to return
+        return {}
+
+    def set_http_response(self, key: str, etag: str, data):
+        # Do nothing
+        pass
+
     def save(self):
         # Do nothing
         pass
@@ -84,6 +98,7 @@ class UserCache:
     This class manages the following data:
         - a list of already ported commits from one branch to another
         - some commits data like impacted file paths
+        - GitHub API responses along with their ETag
 
     It allows to speed up further commit scans on a given module.
     """
@@ -92,6 +107,7 @@ class UserCache:
     _ported_dirname = "ported"
     _to_port_dirname = "to_port"
     _commits_data_dirname = "commits_data"
+    _http_dirname = "http"
 
     def __init__(self, app):
         """Initialize user's cache manager."""
@@ -108,6 +124,10 @@ class UserCache:
         self._commits_to_port = self._get_commits_to_port()
         self._commits_data_path = self._get_commits_data_path()
         self._commits_data = self._get_commits_data()
+        self._http_responses_path = self._get_http_responses_path()
+        self._http_responses = self._get_http_responses()
+        # Paths of cache files updated since they have been loaded
+        self._modified_paths = set()
 
     @classmethod
     def _get_dir_path(cls):
@@ -152,6 +172,15 @@ class UserCache:
             file_name,
         )
 
+    def _get_http_responses_path(self):
+        """Return the file path storing GitHub API responses."""
+        file_name = f"{self.app.repo_name}.json"
+        return self.dir_path.joinpath(
+            self._http_dirname,
+            self.app.upstream_org,
+            file_name,
+        )
+
     def _get_ported_commits(self):
         self._ported_commits_path.parent.mkdir(parents=True, exist_ok=True)
         self._ported_commits_path.touch(exist_ok=True)
@@ -183,6 +212,17 @@ class UserCache:
             nested_dict = lambda: defaultdict(nested_dict)  # noqa
             return nested_dict()
 
+    def _get_http_responses(self):
+        self._http_responses_path.parent.mkdir(parents=True, exist_ok=True)
+        self._http_responses_path.touch(exist_ok=True)
+        try:
+            with self._http_responses_path.open() as file_:
+                return json.load(file_)
+        except json.JSONDecodeError:
+            # Mainly to handle empty files (first initialization of the cache)
+            # but also to not crash if JSON files get corrupted.
+            return {}
+
     def mark_commit_as_ported(self, commit_sha: str):
         """Mark commit as ported."""
         if self.readonly:
@@ -204,6 +244,7 @@ class UserCache:
         pr_number = data["number"]
         self._commits_to_port["pull_requests"][str(pr_number)] = data
         self._commits_to_port["commits"][commit_sha]["pr"] = pr_number
+        self._modified_paths.add(self._commits_to_port_path)
 
     def get_pr_from_commit(self, commit_sha: str):
         """Return the original PR data of a commit."""
@@ -223,6 +264,7 @@ class UserCache:
         if self.readonly:
             return
         self._commits_data[commit_sha]["files"] = list(files)
+        self._modified_paths.add(self._commits_data_path)
         if os.environ.get("OCA_PORT_AGRESSIVE_CACHE_WRITE"):
             # IO can be very slow on some filesystems (like checking modified
             # paths of a commit), and saving the cache on each analyzed commit
@@ -230,8 +272,23 @@ class UserCache:
             # writing its cache on disk, so the next call will be faster.
             self._save_commits_data()
 
+    def get_http_response(self, key: str):
+        """Return the cached GitHub API response of `key` and its ETag."""
+        response = self._http_responses.get(key, {})
+        if time.time() - response.get("time", 0) > HTTP_RESPONSE_TTL:
+            return {}
+        return response
+
+    def set_http_response(self, key: str, etag: str, data):
+        """Store a GitHub API response along with its ETag."""
+        # NOTE: API responses do not depend on the source branch, so they
+        # are stored even if the cache is readonly.
+        self._http_responses[key] = {"etag": etag, "data": data, "time": time.time()}
+        self._modified_paths.add(self._http_responses_path)
+
     def save(self):
-        """Save cache files."""
+        """Save cache files that have been updated."""
+        self._save_http_responses()
         if self.readonly:
             return
         self._save_commits_to_port()
@@ -245,12 +302,33 @@ class UserCache:
         # commits data file
         self._save_cache(self._commits_data, self._commits_data_path)
 
+    def _save_http_responses(self):
+        # GitHub API responses, the most recent ones that are not expired
+        if self._http_responses_path in self._modified_paths:
+            min_time = time.time() - HTTP_RESPONSE_TTL
+            responses = sorted(
+                (
+                    item
+                    for item in self._http_responses.items()
+                    if item[1].get("time", 0) >= min_time
+                ),
+                key=lambda item: item[1]["time"],
+                reverse=True,
+            )
+            self._http_responses = dict(responses[:HTTP_RESPONSES_MAX])
+        self._save_cache(self._http_responses, self._http_responses_path)
+
     def _save_cache(self, cache, path):
+        # Do not rewrite (potentially big) files that didn't change
+        if path not in self._modified_paths:
+            return
         try:
             with path.open(mode="w") as file_:
                 json.dump(cache, file_, indent=2)
         except Exception:
             pass
+        else:
+            self._modified_paths.discard(path)
 
     def clear(self):
         """Clear the cache files."""
@@ -258,6 +336,7 @@ class UserCache:
             self._ported_commits_path,
             self._commits_to_port_path,
             self._commits_data_path,
+            self._http_responses_path,
         ]
         for path in paths:
             if path and path.exists():
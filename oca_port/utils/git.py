@@ -16,6 +16,8 @@ PO_FILE_REGEX = re.compile(r".*i18n/.+\.pot?$")
 
 
 class Branch:
+    __slots__ = ("repo", "name", "remote")
+
     def __init__(self, repo, name, default_remote=None, check_remote=True):
         self.repo = repo
         if len(name.split("/", 1)) > 1:
@@ -60,6 +62,24 @@ class Commit:
     )
     other_equality_attrs = ("paths",)
     eq_strict = True
+    # Lot of instances could be created when analyzing the history of a
+    # repository, save memory by not having a '__dict__' per instance
+    __slots__ = (
+        "raw_commit",
+        "addons_path",
+        "cache",
+        "author_name",
+        "author_email",
+        "authored_datetime",
+        "summary",
+        "message",
+        "hexsha",
+        "committed_datetime",
+        "parents",
+        "_files",
+        "_paths",
+        "ported_commits",
+    )
 
     def __init__(self, commit, addons_path=".", cache=None):
         """Initializes a new Commit instance from a GitPython Commit object."""
@@ -169,7 +189,7 @@ class Commit:
             return all(checks)
 
     def __repr__(self):
-        attrs = ", ".join([f"{k}={v}" for k, v in self.__dict__.items()])
+        attrs = ", ".join([f"{k}={getattr(self, k)}" for k in self.__slots__])
         return f"{self.__class__.__name__}({attrs})"
 
     @property
@@ -293,7 +313,10 @@ class PullRequest(abc.Hashable):
         return data
 
 
-def run_pre_commit(repo, addon, commit=True, hook=None):
+def run_pre_commit(repo, addon, commit=True, hook=None, files=None):
+    if files is not None and not files:
+        # No file to check
+        return
     # Run pre-commit
     print(f"\tRun {bc.BOLD}pre-commit{bc.END} and commit changes if any...")
     # First ensure that 'pre-commit' is initialized for the repository,
@@ -301,9 +324,12 @@ def run_pre_commit(repo, addon, commit=True, hook=None):
     subprocess.check_call("pre-commit install", shell=True)
     if hook:
         subprocess.run(f"pre-commit run {hook}", shell=True)
+    elif files is not None:
+        # Only check the given files instead of the whole repository
+        subprocess.run(["pre-commit", "run", "--files", *files])
     else:
         subprocess.run("pre-commit run -a", shell=True)
-    if repo.untracked_files or repo.is_dirty():
+    if is_dirty(repo, untracked_files=True):
         repo.git.add("-A")
         if commit:
             repo.git.commit(
@@ -311,6 +337,28 @@ def run_pre_commit(repo, addon, commit=True, hook=None):
             )
 
 
+def get_head(repo, name):
+    """Return the local branch `name`, without listing all local branches."""
+    return g.Head(repo, f"refs/heads/{name}")
+
+
+def head_exists(repo, name):
+    """Check if the local branch `name` exists."""
+    # Resolve the reference directly instead of listing all local branches
+    return get_head(repo, name).is_valid()
+
+
+def is_dirty(repo, untracked_files=False):
+    """Check if the working tree or the index have changes.
+
+    Unlike `git.Repo.is_dirty`, which could spawn up to three git processes
+    (staged changes, unstaged changes, then untracked files), this relies
+    on a single `git status` call.
+    """
+    untracked = "normal" if untracked_files else "no"
+    return bool(repo.git.status("--porcelain", f"--untracked-files={untracked}"))
+
+
 def get_changed_paths(repo, modified=True, staged=True):
     """Return a list of file paths that have been changed.
 
@@ -326,9 +374,9 @@ def get_changed_paths(repo, modified=True, staged=True):
     return [diff.a_path or diff.b_path for diff in changed_diff]
 
 
-def check_path_exists(repo, ref, path, rootdir=None):
+def get_folder_paths(repo, ref, rootdir=None):
+    """Return the paths of folders located in `rootdir` on `ref`."""
     root_tree = repo.commit(ref).tree
     if rootdir:
         root_tree /= str(rootdir)
-    paths = [t.path for t in root_tree.trees]
-    return path in paths
+    return frozenset(t.path for t in root_tree.trees)
@@ -5,21 +5,80 @@ import re
 
 import os
 import subprocess
+import urllib.parse
+
 import requests
 
 from .git import PullRequest
 
 GITHUB_API_URL = "https://api.github.com"
+# Number of commits looked up per GraphQL request
+GRAPHQL_BATCH_SIZE = 50
+# Number of results per page of the search API (maximum allowed)
+SEARCH_PAGE_SIZE = 100
+GRAPHQL_COMMIT_PRS = """
+    %(alias)s: object(oid: "%(sha)s") {
+      ... on Commit {
+        associatedPullRequests(first: 10) {
+          nodes {
+            number
+            url
+            title
+            body
+            mergedAt
+            author { login }
+            baseRefName
+            baseRepository { nameWithOwner }
+            commits(first: 100) { nodes { commit { oid } } }
+          }
+        }
+      }
+    }
+"""
+# Fields of search results used by oca-port
+SEARCH_ITEM_FIELDS = ("number", "state", "title", "html_url")
+
+
+def _slim_search_results(data):
+    """Keep only the fields used by oca-port from search results."""
+    items = []
+    for item in data.get("items", []):
+        slim_item = {field: item[field] for field in SEARCH_ITEM_FIELDS}
+        slim_item["user"] = {"login": item["user"]["login"]}
+        items.append(slim_item)
+    return {"total_count": data.get("total_count", 0), "items": items}
 
 
 class GitHub:
-    def __init__(self, token=None):
+    def __init__(self, token=None, cache=None):
         if not token:
             token = self._get_token()
         self.token = token
+        # Optional user's cache used to store responses along with their ETag
+        self.cache = cache
+        # Reuse the same connection across requests
+        self.session = requests.Session()
+
+    def request(
+        self,
+        url: str,
+        method: str = "get",
+        params=None,
+        json=None,
+        use_cache=False,
+        transform=None,
+    ):
+        """Request GitHub API.
 
-    def request(self, url: str, method: str = "get", params=None, json=None):
-        """Request GitHub API."""
+        With `use_cache`, GET responses are stored in the user's cache (if any)
+        with their ETag so further identical requests are conditional: a
+        '304 Not Modified' response has no body and, for authenticated
+        requests only, does not count against the API rate limit.
+        Only responses requested again on each run are worth caching.
+
+        `transform` is applied on the response data before it is cached and
+        returned, e.g. to keep only the needed fields.
+        """
         headers = {"Accept": "application/vnd.github.groot-preview+json"}
         if self.token:
             headers.update({"Authorization": f"token {self.token}"})
@@ -29,10 +88,26 @@ class GitHub:
             kwargs.update(json=json)
         if params:
             kwargs.update(params=params)
-        response = getattr(requests, method)(full_url, **kwargs)
+        cache_key = cached = None
+        if use_cache and self.cache and method == "get":
+            cache_key = full_url
+            if params:
+                cache_key = f"{full_url}?{urllib.parse.urlencode(params)}"
+            cached = self.cache.get_http_response(cache_key)
+            if cached:
+                headers["If-None-Match"] = cached["etag"]
+        response = getattr(self.session, method)(full_url, **kwargs)
+        if cached and response.status_code == 304:
+            return cached["data"]
         if not response.ok:
             raise RuntimeError(response.text)
-        return response.json()
+        data = response.json()
+        if transform:
+            data = transform(data)
+        etag = response.headers.get("ETag")
+        if cache_key and etag:
+            self.cache.set_http_response(cache_key, etag, data)
+        return data
 
     def get_original_pr(
         self, from_org: str, repo_name: str, branch: str, commit_sha: str
@@ -51,6 +126,70 @@ class GitHub:
         ]
         return gh_commit_pull and gh_commit_pull[0] or {}
 
+    def get_original_prs(
+        self, from_org: str, repo_name: str, branch: str, commit_shas: list
+    ):
+        """Return original GitHub PR data of several commits at once.
+
+        Commits are looked up in batches through the GraphQL API, instead of
+        sending one REST request per commit (plus one to list PR commits).
+
+        Return a dict `{commit_sha: data}` where `data` is an empty dict if
+        the commit has no PR. Commits that could not be looked up (e.g. no
+        token to use the GraphQL API) are not part of the result.
+        """
+        result = {}
+        # GraphQL API can't be used anonymously
+        if not self.token:
+            return result
+        repo = f"{from_org}/{repo_name}"
+        for i in range(0, len(commit_shas), GRAPHQL_BATCH_SIZE):
+            shas = commit_shas[i : i + GRAPHQL_BATCH_SIZE]
+            objects = "".join(
+                GRAPHQL_COMMIT_PRS % {"alias": f"c{j}", "sha": sha}
+                for j, sha in enumerate(shas)
+            )
+            query = (
+                f'query {{ repository(owner: "{from_org}", name: "{repo_name}") '
+                f"{{ {objects} }} }}"
+            )
+            response = self.request("graphql", method="post", json={"query": query})
+            # GraphQL errors (rate limit, repository not found, missing token
+            # scope...) are returned with a '200 OK' status
+            repository = (response.get("data") or {}).get("repository")
+            if repository is None:
+                raise RuntimeError(response.get("errors") or response)
+            for j, sha in enumerate(shas):
+                # Unknown commits are returned as 'null' (with an error)
+                gh_commit = repository.get(f"c{j}") or {}
+                gh_commit_pulls = gh_commit.get("associatedPullRequests")
+                if gh_commit_pulls is None:
+                    continue
+                gh_commit_pull = [
+                    data
+                    for data in gh_commit_pulls["nodes"]
+                    if (
+                        data["baseRefName"] == branch
+                        and data["baseRepository"]["nameWithOwner"] == repo
+                    )
+                ]
+                if not gh_commit_pull:
+                    result[sha] = {}
+                    continue
+                data = gh_commit_pull[0]
+                result[sha] = {
+                    "number": data["number"],
+                    "url": data["url"],
+                    "author": (data["author"] or {}).get("login", ""),
+                    "title": data["title"],
+                    "body": data["body"],
+                    "merged_at": data["mergedAt"],
+                    "commits": [
+                        node["commit"]["oid"] for node in data["commits"]["nodes"]
+                    ],
+                }
+        return result
+
     def search_migration_pr(
         self, from_org: str, repo_name: str, branch: str, addon: str
     ):
@@ -58,25 +197,52 @@ class GitHub:
         # NOTE: If the module we are looking for is named 'a_b' and the PR title is
         # written 'a b', we won't get any result, but that's better than returning
         # the wrong PR to the user.
-        # NOTE 2: we first search for open PRs, then closed ones (could be closed
-        # automatically by bots for inactivity)
+        # NOTE 2: closed PRs are returned too (could be closed automatically by
+        # bots for inactivity), but open ones are preferred. 'is:unmerged'
+        # matches both, so one search is usually enough.
         repo = f"{from_org}/{repo_name}"
-        for pr_state in ("open", "unmerged"):
-            prs = self.request(
-                f"search/issues?q=is:pr+is:{pr_state}+repo:{repo}"
-                f"+base:{branch}+in:title++mig+{addon}"
+        query = f"is:pr repo:{repo} base:{branch} in:title mig {addon}"
+        prs, truncated = self._search_migration_prs(f"is:unmerged {query}", addon)
+        # Open PRs first (stable sort: GitHub ordering is kept otherwise)
+        prs.sort(key=lambda pr: pr["state"] != "open")
+        if truncated and (not prs or prs[0]["state"] != "open"):
+            # An open PR could be on the next pages of results
+            open_prs, _ = self._search_migration_prs(f"is:open {query}", addon)
+            prs = open_prs or prs
+        if prs:
+            pr = prs[0]
+            return PullRequest(
+                number=pr["number"],
+                url=pr["html_url"],
+                author=pr["user"]["login"],
+                title=pr["title"],
+                body=None,
             )
-            for pr in prs.get("items", {}):
-                # Searching for 'a' on GitHub could return a result containing 'a_b'
-                # so we check the result for the exact module name to return a relevant PR.
-                if self._addon_in_text(addon, pr["title"]):
-                    return PullRequest(
-                        number=pr["number"],
-                        url=pr["html_url"],
-                        author=pr["user"]["login"],
-                        title=pr["title"],
-                        body=pr["body"],
-                    )
+
+    def _search_migration_prs(self, query: str, addon: str):
+        """Return the PRs of `addon` found on the first page of `query` results.
+
+        Also return `True` if GitHub has more results than this first page.
+        """
+        res = self.search_issues(query)
+        items = res.get("items", [])
+        # Searching for 'a' on GitHub could return a result containing 'a_b'
+        # so we check the result for the exact module name to return a relevant PR.
+        prs = [pr for pr in items if self._addon_in_text(addon, pr["title"])]
+        return prs, res.get("total_count", 0) > len(items)
+
+    def search_issues(self, query: str):
+        """Return the first page of issues/PRs matching `query`.
+
+        Searches are done again on each run, their results are cached
+        with only the fields used by oca-port.
+        """
+        return self.request(
+            "search/issues",
+            params={"q": query, "per_page": SEARCH_PAGE_SIZE},
+            use_cache=True,
+            transform=_slim_search_results,
+        )
 
     def _addon_in_text(self, addon: str, text: str):
         """Return `True` if `addon` is present in `text`."""
@@ -91,6 +257,7 @@ class GitHub:
                 token = subprocess.check_output(
                     ["gh", "auth", "token"], text=True
                 ).strip()
-            except subprocess.SubprocessError:
+            except (subprocess.SubprocessError, FileNotFoundError):
+                # 'gh' failed or is not installed
                 pass
         return token
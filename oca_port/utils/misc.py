@@ -1,10 +1,12 @@
 # Copyright 2022 Camptocamp SA
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl)
 
+import functools
 import giturlparse
 import json
 import os
 import re
+import sys
 from collections import defaultdict
 
 MANIFEST_NAMES = ("__manifest__.py", "__openerp__.py")
@@ -33,6 +35,31 @@ class bcolors:
     END = "\033[0m"
 
 
+# Do not emit color sequences if the output is not a terminal (pipe, file...)
+# NOTE: 'sys.stdout' is 'None' when there is no console (pythonw, services...)
+if not (sys.stdout and sys.stdout.isatty()):
+    for _name in [name for name in vars(bcolors) if name.isupper()]:
+        setattr(bcolors, _name, "")
+
+
+REMOTE_ERROR_MSG = (
+    f"No remote {bcolors.FAIL}{{remote}}{bcolors.END} in the current repository.\n"
+    "To add it:\n"
+    "\t# This mode requires an SSH key in the GitHub account\n"
+    f"\t{bcolors.DIM}$ git remote add {{remote}} "
+    f"git@github.com:{{remote}}/{{repo_name}}.git{bcolors.END}\n"
+    "   Or:\n"
+    "\t# This will require to enter user/password each time\n"
+    f"\t{bcolors.DIM}$ git remote add {{remote}} "
+    f"https://github.com/{{remote}}/{{repo_name}}.git{bcolors.END}"
+)
+
+
+def prepare_remote_error_msg(repo_name, remote):
+    """Return the error message to display when `remote` doesn't exist."""
+    return REMOTE_ERROR_MSG.format(repo_name=repo_name, remote=remote)
+
+
 def clean_text(text):
     """Clean text by removing patterns like '13.0', '[13.0]' or '[IMP]'."""
     return re.sub(r"\[.*\]|\d+\.\d+", "", text).strip()
@@ -83,6 +110,17 @@ def parse_ref(ref):
     return SmartDict(group.groupdict()) if group else None
 
 
+@functools.lru_cache(maxsize=256)
+def parse_remote_url(url):
+    """Parse a remote URL, return a tuple `(platform, org, repo)`."""
+    p = giturlparse.parse(url)
+    try:
+        repo = p.repo
+    except AttributeError:
+        repo = None
+    return p.platform, p.owner, repo
+
+
 def extract_ref_info(repo, kind, ref, remote=None):
     """Extract info from `ref`.
 
@@ -96,26 +134,16 @@ def extract_ref_info(repo, kind, ref, remote=None):
     info["kind"] = kind
     info["remote"] = info["remote"] or remote
     info.update({"org": None, "platform": None})
-    if info["remote"]:
-        remote_url = repo.remotes[info["remote"]].url
-        p = giturlparse.parse(remote_url)
-        try:
-            info["repo"] = p.repo
-        except AttributeError:
-            pass
-        info["platform"] = p.platform
-        info["org"] = p.owner
-    else:
-        # Fallback on 'origin' to grab info like platform, and repository name
-        if "origin" in repo.remotes:
-            remote_url = repo.remotes["origin"].url
-            p = giturlparse.parse(remote_url)
-            try:
-                info["repo"] = p.repo
-            except AttributeError:
-                pass
-            info["platform"] = p.platform
-            info["org"] = p.owner
+    # Fallback on 'origin' to grab info like platform, and repository name
+    remote_name = info["remote"]
+    if not remote_name and "origin" in repo.remotes:
+        remote_name = "origin"
+    if remote_name:
+        platform, org, repo_name = parse_remote_url(repo.remotes[remote_name].url)
+        if repo_name is not None:
+            info["repo"] = repo_name
+        info["platform"] = platform
+        info["org"] = org
     return info
 
 
@@ -111,13 +111,13 @@ class InputStorage:
         all_in_storage = all(
             path.startswith(self.storage_dirname) for path in changed_paths
         )
-        if self.repo.is_dirty() and not all_in_storage:
+        if g.is_dirty(self.repo) and not all_in_storage:
             raise click.ClickException(
                 "changes not committed detected in this repository."
             )
         # Commit all changes under ./.oca-port
         self.repo.index.add(self.storage_dirname)
-        if self.repo.is_dirty():
+        if g.is_dirty(self.repo):
             g.run_pre_commit(self.repo, self.addon, commit=False, hook="prettier")
             self.repo.index.commit(msg or f"oca-port: store '{self.addon}' data")
             self.dirty = False